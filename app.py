@@ -3,19 +3,60 @@ Newsletter Builder - Streamlit Application
 A web application for generating responsive HTML newsletters with dynamic content layers.
 """
 
-import base64
+import binascii
+import functools
+import hashlib
 import io
+import json
 import re
+import threading
 import time
-from typing import Dict, List, Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import streamlit as st
 from bs4 import BeautifulSoup
-from PIL import Image
+from markupsafe import escape
 from streamlit_quill import st_quill
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, DuplicateKeyError
 
+try:
+    # SIMD-accelerated Base64 for embedded images; binascii is the fallback
+    from pybase64 import b64encode as encode_base64
+except ImportError:
+    encode_base64 = functools.partial(binascii.b2a_base64, newline=False)
+
+
+# Font stacks offered in the sidebar, in selectbox order
+FONT_OPTIONS = (
+    "Oswald, sans-serif",
+    "Arial, sans-serif",
+    "Helvetica, sans-serif",
+    "Georgia, serif",
+    "Times New Roman, serif",
+    "Verdana, sans-serif",
+    "Courier New, monospace",
+    "Trebuchet MS, sans-serif",
+    "Comic Sans MS, cursive",
+)
+# Selectbox index of each font stack (dict lookup instead of list.index scans)
+FONT_OPTION_INDEX = {font: index for index, font in enumerate(FONT_OPTIONS)}
+# Footer social media display modes
+SOCIAL_MEDIA_TYPE_OPTIONS = ("URLs Only", "Images")
+# Image source choices shared by the header, footer and layer forms
+IMAGE_SOURCE_OPTIONS = ("External URL", "Upload Image (Base64)")
+# Image position within a layer
+LAYER_ALIGNMENT_OPTIONS = ('Left', 'Right')
+# Footer content alignment and footer image placement
+FOOTER_ALIGNMENT_OPTIONS = ('Left', 'Center', 'Right')
+FOOTER_IMAGE_POSITION_OPTIONS = ("Above Text", "After Text")
+# Accepted file extensions for the uploaders (built once, not on every rerun;
+# st.file_uploader matches extensions case-insensitively)
+IMAGE_UPLOAD_TYPES = ('jpg', 'jpeg', 'png')
+SOCIAL_ICON_UPLOAD_TYPES = IMAGE_UPLOAD_TYPES + ('svg',)
+TEMPLATE_UPLOAD_TYPES = ('html', 'htm')
 
 def apply_reset_defaults():
     """
@@ -181,9 +222,9 @@ def apply_reset_defaults():
     apply_defaults(subscription_defaults)
     
     # Clear preview/download artifacts
-    for k in ["newsletter_html", "newsletter_subject"]:
-        if k in st.session_state:
-            del st.session_state[k]
+    for key in ("newsletter_config", "newsletter_config_digest"):
+        if key in st.session_state:
+            del st.session_state[key]
     
     st.session_state['force_reset_fields'] = False
     
@@ -521,28 +562,143 @@ class MongoManager:
             self.client.close()
 
 
-# Global MongoDB manager instance
-_mongo_manager = None
+@st.cache_resource(show_spinner=False)
+def get_mongo_manager() -> MongoManager:
+    """
+    Get or create the shared MongoDB manager instance.
+    
+    Streamlit re-executes this script on every rerun, which resets module
+    globals; st.cache_resource keeps one manager (and its MongoClient pool,
+    server check and index setup) alive across reruns and sessions.
+    """
+    return MongoManager()
+
+
+# Embedded images keep this many pixels per displayed CSS pixel (sharp on HiDPI screens)
+IMAGE_PIXEL_DENSITY = 2
+# Uploaded JPEGs up to this size are embedded without re-encoding
+JPEG_PASSTHROUGH_MAX_BYTES = 300 * 1024
+# Re-encoded JPEGs up to this many pixels keep the higher quality setting
+JPEG_HIGH_QUALITY_MAX_PIXELS = 500_000
+# Re-encoded JPEGs with more pixels than this (roughly 10 KB of output at the
+# qualities used) are saved as progressive JPEGs
+JPEG_PROGRESSIVE_MIN_PIXELS = 50_000
+# Uploaded PNGs up to this size are embedded without re-encoding
+PNG_PASSTHROUGH_MAX_BYTES = 300 * 1024
+# File signature every PNG starts with
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# PNG chunks that only describe pixels; a PNG with any other chunk (text, EXIF,
+# timestamps, editor data) is re-encoded so that metadata is dropped
+PNG_PASSTHROUGH_CHUNKS = frozenset({
+    b'IHDR', b'PLTE', b'tRNS', b'IDAT', b'IEND', b'gAMA', b'sRGB', b'pHYs',
+})
+# JPEG color modes every email client renders correctly
+JPEG_PASSTHROUGH_MODES = frozenset({'RGB', 'L'})
+# Header segments a JPEG may carry and still be embedded as uploaded (JFIF,
+# ICC color profile, Adobe color transform), by marker and payload prefix.
+# Anything else (EXIF with GPS/camera data, XMP, IPTC, comments) forces a
+# re-encode, which drops it
+JPEG_PASSTHROUGH_SEGMENTS = {
+    'APP0': (b'JFIF\x00', b'JFXX\x00'),
+    'APP2': (b'ICC_PROFILE\x00',),
+    'APP14': (b'Adobe',),
+}
+# EXIF Orientation tag, and the orientations that swap width and height
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_TRANSPOSED_ORIENTATIONS = frozenset({5, 6, 7, 8})
+# Scratch encode buffers that grew beyond this are dropped instead of reused
+SCRATCH_BUFFER_MAX_BYTES = 4 * 1024 * 1024
+# Idle scratch buffers kept for reuse across encodes and reruns
+SCRATCH_BUFFER_POOL_SIZE = 4
+# Data URI headers for the two formats images are embedded as
+JPEG_DATA_URI_PREFIX = 'data:image/jpeg;base64,'
+PNG_DATA_URI_PREFIX = 'data:image/png;base64,'
+# Raw bytes Base64-encoded per step when building a data URI (a multiple of 3,
+# so every chunk encodes without padding except the last)
+BASE64_CHUNK_BYTES = 3 * 64 * 1024
+# Upper bound on threads used to encode uploaded images in parallel
+PREFETCH_MAX_WORKERS = 8
+# Pillow modes that already carry PNG transparency
+PNG_TRANSPARENT_MODES = frozenset({'RGBA', 'LA', 'P'})
+# Opaque PNGs with more pixels than this (photos, screenshots) are re-encoded as JPEG
+OPAQUE_PNG_JPEG_MIN_PIXELS = 200_000
+# Upload digests remembered per file_id before the memo is reset
+UPLOAD_DIGEST_MAX_ENTRIES = 64
 
 
-def get_mongo_manager() -> MongoManager:
-    """Get or create global MongoDB manager instance."""
-    global _mongo_manager
-    if _mongo_manager is None:
-        _mongo_manager = MongoManager()
-    return _mongo_manager
+class BufferPool:
+    """
+    Bounded, thread-safe pool of BytesIO buffers reused across image encodes.
+    
+    Buffers are rewound instead of truncated, so their allocation survives and
+    later saves write in place instead of growing a fresh buffer step by step.
+    """
+    
+    def __init__(self, max_buffers: int = SCRATCH_BUFFER_POOL_SIZE,
+                 max_buffer_bytes: int = SCRATCH_BUFFER_MAX_BYTES):
+        """
+        Initialize an empty pool.
+        
+        Args:
+            max_buffers: Maximum number of idle buffers kept
+            max_buffer_bytes: Buffers that grew beyond this are dropped on release
+        """
+        self.max_buffers = max_buffers
+        self.max_buffer_bytes = max_buffer_bytes
+        self._buffers: List[io.BytesIO] = []
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> io.BytesIO:
+        """Take an idle buffer (or a new one) positioned at the start."""
+        with self._lock:
+            buffer = self._buffers.pop() if self._buffers else io.BytesIO()
+        buffer.seek(0)
+        return buffer
+    
+    def release(self, buffer: io.BytesIO):
+        """Return a buffer to the pool unless the pool is full or one huge image grew it too much."""
+        if buffer.getbuffer().nbytes > self.max_buffer_bytes:
+            return
+        with self._lock:
+            if len(self._buffers) < self.max_buffers:
+                self._buffers.append(buffer)
+
+
+@st.cache_resource(show_spinner=False)
+def get_buffer_pool() -> BufferPool:
+    """
+    Get the process-wide encode buffer pool.
+    
+    Held with st.cache_resource so it outlives script reruns and the short-lived
+    prefetch threads, which would otherwise each start from an empty buffer.
+    """
+    return BufferPool()
+
+
+@st.cache_resource(show_spinner=False)
+def get_upload_digests() -> Dict[str, str]:
+    """
+    Get the process-wide map of uploaded file_id to content digest.
+    
+    Held with st.cache_resource because Streamlit re-executes this module on
+    every full rerun, which would reset a class- or module-level dict and hash
+    every upload again. file_ids are unique per upload, so sessions share it safely.
+    """
+    return {}
 
 
 class ImageProcessor:
     """Handles image processing and Base64 encoding for newsletter embedding."""
 
     @staticmethod
-    def convert_to_base64(image_file) -> Optional[str]:
+    def convert_to_base64(image_file, max_width: Optional[int] = None) -> Optional[str]:
         """
         Convert uploaded image file to Base64 string.
         
         Args:
             image_file: Streamlit UploadedFile object
+            max_width: Width in pixels the image is displayed at; images wider
+                than IMAGE_PIXEL_DENSITY times this are downscaled before encoding (optional)
             
         Returns:
             Base64 encoded string with data URI prefix, or None if conversion fails
@@ -551,46 +707,354 @@ class ImageProcessor:
             return None
         
         try:
-            # Open image with Pillow
-            img = Image.open(image_file)
-            
-            # Determine if original is PNG to preserve transparency
-            is_png = image_file.type in ['image/png', 'image/PNG'] or img.format == 'PNG'
-            
-            # Save to bytes buffer
-            buffer = io.BytesIO()
+            # Streamlit reruns the whole script on every widget change, so the
+            # encoded result is cached on the file bytes to skip Pillow on reruns
+            return ImageProcessor._encode_image_bytes(
+                ImageProcessor._upload_digest(image_file), image_file.getvalue(), max_width
+            )
+        except Exception as e:
+            st.error(f"Error processing image: {str(e)}")
+            return None
+
+    @staticmethod
+    def prefetch_base64(uploads: List[Tuple[object, Optional[int]]]):
+        """
+        Encode several uploaded images concurrently to warm the encoder cache.
+        
+        Pillow releases the GIL while decoding and encoding, so the thread pool
+        spreads the work across cores. Failures are ignored here; they are
+        reported when the owning form calls convert_to_base64.
+        
+        Args:
+            uploads: (UploadedFile or None, max_width) pairs
+        """
+        pending = [
+            (ImageProcessor._upload_digest(image_file), image_file.getvalue(), max_width)
+            for image_file, max_width in uploads if image_file is not None
+        ]
+        if len(pending) < 2:
+            return
+        
+        with ThreadPoolExecutor(max_workers=min(PREFETCH_MAX_WORKERS, len(pending))) as executor:
+            for digest, image_data, max_width in pending:
+                executor.submit(ImageProcessor._encode_image_bytes, digest, image_data, max_width)
+
+    @staticmethod
+    def _upload_digest(image_file) -> str:
+        """
+        Return a content hash of an uploaded file, computed once per upload.
+        
+        The digest is remembered per file_id across reruns, so the raw bytes are
+        hashed once rather than by the encoder cache on every lookup.
+        """
+        file_id = getattr(image_file, 'file_id', None)
+        upload_digests = get_upload_digests()
+        digest = upload_digests.get(file_id)
+        if digest is None:
+            digest = hashlib.blake2b(image_file.getvalue(), digest_size=16).hexdigest()
+            if file_id is not None:
+                if len(upload_digests) >= UPLOAD_DIGEST_MAX_ENTRIES:
+                    upload_digests.clear()
+                upload_digests[file_id] = digest
+        return digest
+
+    @staticmethod
+    @st.cache_resource(show_spinner=False, max_entries=32)
+    def _encode_image_bytes(digest: str, _image_data: bytes, max_width: Optional[int] = None) -> str:
+        """
+        Re-encode raw image bytes and build the Base64 data URI.
+        
+        The cache is keyed on the content digest and width only; the leading
+        underscore keeps Streamlit from hashing the raw bytes again. Data URIs
+        are immutable strings, so st.cache_resource hands every caller the same
+        object instead of unpickling a fresh multi-megabyte copy per hit, and an
+        image used in several places is encoded and held in memory only once.
+        
+        The format is taken from the file signature Pillow sniffs while opening,
+        not from the browser-reported MIME type or file extension.
+        
+        Args:
+            digest: Content hash of the image bytes (see _upload_digest)
+            _image_data: Raw bytes of the uploaded image
+            max_width: Displayed width in pixels (optional)
             
+        Returns:
+            Base64 encoded string with data URI prefix
+        """
+        # Images with more pixels than a HiDPI screen shows at their display
+        # width (e.g. camera photos) are shrunk before encoding
+        target_width = max_width * IMAGE_PIXEL_DENSITY if max_width else None
+        
+        # Small PNGs without metadata already carry any transparency they have
+        # and are embedded as uploaded. Their width sits at a fixed offset in the
+        # IHDR chunk, so this check needs neither Pillow nor a decoder
+        if (_image_data.startswith(PNG_SIGNATURE) and _image_data[12:16] == b'IHDR'
+                and len(_image_data) <= PNG_PASSTHROUGH_MAX_BYTES
+                and not (target_width and int.from_bytes(_image_data[16:20], 'big') > target_width)
+                and ImageProcessor._png_has_only_pixel_chunks(_image_data)):
+            return ImageProcessor._build_data_uri(PNG_DATA_URI_PREFIX, _image_data)
+        
+        # Pillow is imported on first use so sessions that never upload an
+        # image don't pay for it at startup
+        from PIL import Image, ImageOps
+        
+        # Open image with Pillow (reads the header only, pixels are decoded lazily)
+        img = Image.open(io.BytesIO(_image_data))
+        # exif_transpose returns a new image without a format, so the source
+        # format is read before the rotation is applied
+        source_format = img.format
+        
+        # Phone photos store their rotation as an EXIF tag, which re-encoding
+        # drops, so the rotation is applied to the pixels below; the width
+        # checks use the width the image is displayed at
+        orientation = img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+        display_width = img.height if orientation in EXIF_TRANSPOSED_ORIENTATIONS else img.width
+        needs_resize = bool(target_width) and display_width > target_width
+        
+        # Small JPEGs in a browser-safe mode without metadata are embedded as
+        # uploaded; decoding and re-encoding them only costs time and quality
+        if (not needs_resize and source_format == 'JPEG' and img.mode in JPEG_PASSTHROUGH_MODES
+                and len(_image_data) <= JPEG_PASSTHROUGH_MAX_BYTES
+                and not ImageProcessor._jpeg_has_metadata(img)):
+            return ImageProcessor._build_data_uri(JPEG_DATA_URI_PREFIX, _image_data)
+        
+        # Large JPEGs are decoded at a reduced 1/2, 1/4 or 1/8 scale straight from
+        # the DCT data, before any mode conversion loads them at full size. Twice
+        # the target width is kept so the LANCZOS pass below still has detail
+        if needs_resize and source_format == 'JPEG':
+            draft_width = target_width * 2
+            img.draft(None, (img.width * draft_width // display_width,
+                             img.height * draft_width // display_width))
+        
+        if orientation != 1:
+            img = ImageOps.exif_transpose(img)
+        
+        # Determine if original is PNG to preserve transparency. Large PNGs
+        # without any see-through pixel are usually photos, which JPEG encodes
+        # much faster and several times smaller
+        is_png = source_format == 'PNG'
+        if (is_png and img.width * img.height > OPAQUE_PNG_JPEG_MIN_PIXELS
+                and ImageProcessor._is_opaque(img)):
+            is_png = False
+        
+        if is_png:
+            # Preserve PNG format and transparency. Opaque RGB/greyscale PNGs are
+            # saved as they are; an extra all-255 alpha channel only adds bytes
+            if img.mode in JPEG_PASSTHROUGH_MODES and 'transparency' not in img.info:
+                pass
+            elif img.mode not in PNG_TRANSPARENT_MODES:
+                # Color-keyed and other modes become RGBA, preserving transparency
+                img = img.convert('RGBA')
+            elif img.mode == 'P' and needs_resize:
+                # Palette images can only be resampled with nearest neighbour
+                img = img.convert('RGBA')
+        elif img.mode != 'RGB':
+            # Convert to RGB for JPEG (no transparency support)
+            img = img.convert('RGB')
+        
+        if needs_resize:
+            img.thumbnail((target_width, img.height), Image.Resampling.LANCZOS)
+        
+        # Save to a pooled scratch buffer
+        buffer_pool = get_buffer_pool()
+        buffer = buffer_pool.acquire()
+        try:
             if is_png:
-                # Preserve PNG format and transparency (RGBA mode)
-                if img.mode not in ('RGBA', 'LA', 'P'):
-                    # Convert to RGBA if not already, preserving transparency
-                    if img.mode == 'RGB':
-                        img = img.convert('RGBA')
-                    else:
-                        img = img.convert('RGBA')
-                img.save(buffer, format='PNG', optimize=True)
-                mime_type = 'image/png'
+                # zlib's default level; optimize=True roughly doubles the save
+                # time for a size gain of a few percent
+                img.save(buffer, format='PNG')
+                data_uri_prefix = PNG_DATA_URI_PREFIX
             else:
-                # Convert to RGB for JPEG (no transparency support)
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                img.save(buffer, format='JPEG', quality=95)
-                mime_type = 'image/jpeg'
-            
-            buffer.seek(0)
+                # Large photos tolerate stronger compression; progressive scans only
+                # pay off once the output is past thumbnail size, which is judged
+                # from the pixels left after resizing, not from the upload size
+                pixel_count = img.width * img.height
+                quality = 85 if pixel_count > JPEG_HIGH_QUALITY_MAX_PIXELS else 90
+                img.save(
+                    buffer,
+                    format='JPEG',
+                    quality=quality,
+                    optimize=True,
+                    progressive=pixel_count > JPEG_PROGRESSIVE_MIN_PIXELS
+                )
+                data_uri_prefix = JPEG_DATA_URI_PREFIX
             
-            # Encode to Base64
-            img_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+            # The decoded pixels are no longer needed; free them before the
+            # Base64 output is allocated so the two never peak together
+            img.close()
             
-            return f"data:{mime_type};base64,{img_base64}"
-        except Exception as e:
-            st.error(f"Error processing image: {str(e)}")
-            return None
+            # Encode to Base64 only the bytes written by this save; a previous,
+            # larger image may still occupy the buffer past that point
+            with buffer.getbuffer() as view:
+                return ImageProcessor._build_data_uri(data_uri_prefix, view[:buffer.tell()])
+        finally:
+            buffer_pool.release(buffer)
+
+    @staticmethod
+    def _png_has_only_pixel_chunks(data: bytes) -> bool:
+        """Return True if every chunk of a PNG up to IEND is in PNG_PASSTHROUGH_CHUNKS."""
+        # Each chunk is a 4-byte length, a 4-byte type, the data and a 4-byte CRC
+        offset = len(PNG_SIGNATURE)
+        while offset + 8 <= len(data):
+            chunk_type = data[offset + 4:offset + 8]
+            if chunk_type not in PNG_PASSTHROUGH_CHUNKS:
+                return False
+            if chunk_type == b'IEND':
+                return True
+            offset += 12 + int.from_bytes(data[offset:offset + 4], 'big')
+        # Truncated file without IEND; let Pillow deal with it
+        return False
+
+    @staticmethod
+    def _jpeg_has_metadata(img) -> bool:
+        """Return True if a JPEG carries header segments beyond JPEG_PASSTHROUGH_SEGMENTS."""
+        return not all(
+            data.startswith(JPEG_PASSTHROUGH_SEGMENTS.get(marker, ()))
+            for marker, data in img.applist
+        )
+
+    @staticmethod
+    def _is_opaque(img) -> bool:
+        """Return True if a Pillow image has no transparent or translucent pixels."""
+        if img.mode in ('RGBA', 'LA'):
+            return img.getchannel('A').getextrema() == (255, 255)
+        return img.mode in JPEG_PASSTHROUGH_MODES and 'transparency' not in img.info
+
+    @staticmethod
+    def _build_data_uri(prefix: str, data) -> str:
+        """
+        Base64-encode image bytes into a data URI.
+        
+        The output is written chunk by chunk into one preallocated buffer that
+        already holds the prefix, so the only full-size copy is the final decode
+        (no separate encoded bytes, decoded string and concatenated result).
+        
+        Args:
+            prefix: Data URI header, e.g. JPEG_DATA_URI_PREFIX
+            data: Bytes-like object holding the encoded image
+        """
+        with memoryview(data) as view:
+            size = view.nbytes
+            uri = bytearray(len(prefix) + 4 * ((size + 2) // 3))
+            uri[:len(prefix)] = prefix.encode('ascii')
+            position = len(prefix)
+            for start in range(0, size, BASE64_CHUNK_BYTES):
+                chunk = encode_base64(view[start:start + BASE64_CHUNK_BYTES])
+                uri[position:position + len(chunk)] = chunk
+                position += len(chunk)
+        return uri.decode('ascii')
+
+
+# Gmail clips messages whose HTML exceeds this size, hiding the rest behind a
+# "View entire message" link; inline Base64 images are the usual cause
+EMAIL_CLIP_THRESHOLD_BYTES = 102 * 1024
+
+
+# Static parts of the newsletter document. Only the title, body font, width and
+# background color change between renders, so the fixed markup is joined once at
+# import time instead of on every "Generate" click.
+DOCUMENT_PREAMBLE = '\n'.join([
+    '<!DOCTYPE html>',
+    '<html lang="en">',
+    '<head>',
+    '<meta charset="UTF-8">',
+    '<meta name="viewport" content="width=device-width, initial-scale=1.0">',
+])
+
+GOOGLE_FONTS_LINK = (
+    '<link href="https://fonts.googleapis.com/css2?family=Oswald:wght@200;300;400;500;600;700&display=swap" '
+    'rel="stylesheet">'
+)
+
+DOCUMENT_HEAD_CLOSE = '\n'.join([
+    '<style>',
+    '.ql-align-center { text-align: center; }',
+    '.ql-align-right { text-align: right; }',
+    '.ql-align-justify { text-align: justify; }',
+    '</style>',
+    '</head>',
+])
+
+DOCUMENT_BODY_OPEN = '\n'.join([
+    '<table role="presentation" style="width: 100%; border-collapse: collapse; background-color: #FFFFFF;">',
+    '<tr>',
+    '<td align="center" style="padding: 20px 0;">',
+])
+
+DOCUMENT_CLOSE = '\n'.join([
+    '</table>',
+    '</td>',
+    '</tr>',
+    '</table>',
+    '</body>',
+    '</html>',
+])
+
+# Grey rule above the subscription block (a one-pixel table cell, since email
+# clients render <hr> inconsistently)
+SUBSCRIPTION_SEPARATOR_ROW = '\n'.join([
+    '<tr>',
+    '<td style="padding: 20px 20px 10px 20px;">',
+    '<table role="presentation" style="width: 100%; border-collapse: collapse;">',
+    '<tr>',
+    '<td style="height: 1px; background-color: #e0e0e0; line-height: 1px; font-size: 1px;">&nbsp;</td>',
+    '</tr>',
+    '</table>',
+    '</td>',
+    '</tr>',
+])
+
+# Translation tables for multi-line text fields, applied in a single pass.
+# Footer address/directors come back from imported templates as HTML (with <br>),
+# so only their newlines are converted. The plain-text branches of layer content
+# and header text also escape angle brackets; '&' is left alone because imported
+# text already carries entities and escaping it again would double-encode them.
+NEWLINE_TO_BR = str.maketrans({'\n': '<br>'})
+PLAIN_TEXT_TO_HTML = str.maketrans({'<': '&lt;', '>': '&gt;', '\n': '<br>'})
+
+# Inline text-align style for each footer alignment option
+FOOTER_ALIGN_STYLES = {
+    'left': 'text-align: left;',
+    'center': 'text-align: center;',
+    'right': 'text-align: right;',
+}
+
+# Social networks in the footer: session/config key prefix and display label
+SOCIAL_NETWORKS = (
+    ('facebook', 'Facebook'),
+    ('linkedin', 'LinkedIn'),
+    ('xing', 'Xing'),
+    ('instagram', 'Instagram'),
+)
 
 
 class NewsletterGenerator:
     """Generates HTML newsletter structure with inline CSS for email compatibility."""
     
+    @staticmethod
+    def config_digest(newsletter_config: Dict) -> str:
+        """Return a stable content hash of a generate_html keyword-argument dict."""
+        serialized = json.dumps(newsletter_config, sort_keys=True, default=str)
+        return hashlib.blake2b(serialized.encode('utf-8'), digest_size=16).hexdigest()
+    
+    @staticmethod
+    @st.cache_resource(show_spinner=False, max_entries=8)
+    def render_cached(config_digest: str, _newsletter_config: Dict) -> str:
+        """
+        Render a newsletter with generate_html, cached on its config digest.
+        
+        The digest is computed once when the newsletter is generated; keying the
+        cache on it means reruns don't re-hash every embedded Base64 image just
+        to find the HTML again, as caching on the raw arguments would. The HTML
+        is an immutable string, so st.cache_resource hands the preview and the
+        download the same object instead of unpickling a multi-MB copy for each.
+        
+        Args:
+            config_digest: config_digest() of _newsletter_config
+            _newsletter_config: Keyword arguments for generate_html (not hashed)
+        """
+        return NewsletterGenerator.generate_html(**_newsletter_config)
+    
     @staticmethod
     def generate_html(
         subject: str,
@@ -620,64 +1084,47 @@ class NewsletterGenerator:
         Returns:
             Complete HTML string ready for email
         """
-        # Check if Oswald font is selected and add Google Fonts link
-        include_google_fonts = 'Oswald' in font_family
-        
-        html_parts = [
-            '<!DOCTYPE html>',
-            '<html lang="en">',
-            '<head>',
-            f'<meta charset="UTF-8">',
-            f'<meta name="viewport" content="width=device-width, initial-scale=1.0">',
-            f'<title>{subject}</title>',
-        ]
-        
         # Add Google Fonts link if Oswald is selected
-        if include_google_fonts:
-            html_parts.append('<link href="https://fonts.googleapis.com/css2?family=Oswald:wght@200;300;400;500;600;700&display=swap" rel="stylesheet">')
-        
-        html_parts.extend([
-            '<style>',
-            '.ql-align-center { text-align: center; }',
-            '.ql-align-right { text-align: right; }',
-            '.ql-align-justify { text-align: justify; }',
-            '</style>',
-            '</head>',
-            f'<body style="margin: 0; padding: 0; font-family: {font_family}; background-color: #FFFFFF;">',
-            '<table role="presentation" style="width: 100%; border-collapse: collapse; background-color: #FFFFFF;">',
-            '<tr>',
-            '<td align="center" style="padding: 20px 0;">',
+        fonts_link = f'{GOOGLE_FONTS_LINK}\n' if 'Oswald' in font_family else ''
+        
+        # Head and opening tables are one small template
+        html_out = io.StringIO()
+        write = html_out.write
+        write(
+            f'{DOCUMENT_PREAMBLE}\n'
+            f'<title>{escape(subject)}</title>\n'
+            f'{fonts_link}'
+            f'{DOCUMENT_HEAD_CLOSE}\n'
+            f'<body style="margin: 0; padding: 0; font-family: {font_family}; background-color: #FFFFFF;">\n'
+            f'{DOCUMENT_BODY_OPEN}\n'
             f'<table role="presentation" style="width: {max_width}px; max-width: 100%; border-collapse: collapse; '
-            f'background-color: {background_color}; margin: 0 auto;">',
-        ])
-
-        html_parts.extend(NewsletterGenerator._generate_header_html(subject, header_config))
+            f'background-color: {background_color}; margin: 0 auto;">\n'
+        )
         
-        # Add each layer
+        # Sections are written straight into the buffer, which joins them once in
+        # getvalue(); layers carry their Base64 images, so no intermediate copy of
+        # them is built. This only runs when render_cached misses on a new
+        # configuration digest, so the sections are not memoised separately
+        write(NewsletterGenerator._generate_header_html(subject, header_config))
+        write('\n')
+        render_layer = NewsletterGenerator._generate_layer_html
         for layer in layers:
-            html_parts.extend(NewsletterGenerator._generate_layer_html(layer, text_color))
-
-        # Add footer section
-        html_parts.extend(NewsletterGenerator._generate_footer_html(footer_config))
+            write(render_layer(layer, text_color))
+            write('\n')
+        write(NewsletterGenerator._generate_footer_html(footer_config))
+        write('\n')
         
         # Add subscription section if configured
         if subscription_config:
-            html_parts.extend(NewsletterGenerator._generate_subscription_html(subscription_config))
+            write(NewsletterGenerator._generate_subscription_html(subscription_config))
+            write('\n')
         
         # Close tables and body
-        html_parts.extend([
-            '</table>',
-            '</td>',
-            '</tr>',
-            '</table>',
-            '</body>',
-            '</html>'
-        ])
-        
-        return '\n'.join(html_parts)
+        write(DOCUMENT_CLOSE)
+        return html_out.getvalue()
     
     @staticmethod
-    def _generate_layer_html(layer: Dict, text_color: str) -> List[str]:
+    def _generate_layer_html(layer: Dict, text_color: str) -> str:
         """
         Generate HTML for a single content layer with image on left or right.
         
@@ -686,28 +1133,19 @@ class NewsletterGenerator:
             text_color: Primary text color hex code (for content)
             
         Returns:
-            List of HTML strings for the layer
+            HTML string for the layer
         """
-        html_parts = []
-        
         # Get layer configuration
         padding = layer.get('padding', 30)
         image_alignment = layer.get('image_alignment', 'left').lower()
-        # Get image source - check both URL and Base64, prefer non-empty values
         image_url = layer.get('image_url')
         image_base64 = layer.get('image_base64')
-        # Determine which image source to use (URL takes precedence if both exist)
-        if image_url and image_url.strip():
-            image_src = image_url.strip()
-        elif image_base64:
-            image_src = image_base64
-        else:
-            image_src = None
         image_width = layer.get('image_width', 210)
         
-        title = layer.get('title', '')
-        subtitle = layer.get('subtitle', '')
-        subtitle2 = layer.get('subtitle2', '')
+        # Plain-text fields and URLs are escaped (import decodes them back); Base64 data URIs are not
+        title = escape(layer.get('title', ''))
+        subtitle = escape(layer.get('subtitle', ''))
+        subtitle2 = escape(layer.get('subtitle2', ''))
         content = layer.get('content', '')
         
         title_color = layer.get('title_color', text_color)
@@ -726,106 +1164,83 @@ class NewsletterGenerator:
         content_color = layer.get('content_color', '#000000')
         
         # Get link URL if provided
-        link_url = layer.get('link_url', '').strip()
-        has_link = bool(link_url)
+        link_url = escape(layer.get('link_url', '').strip())
         
-        # Layer container with padding
-        html_parts.append('<tr class="layer_template">')
-        html_parts.append(f'<td style="padding: {padding}px 20px;">')
+        # Determine which image source to use (URL takes precedence if both
+        # exist); stripped once here so the layout check below is a plain test
+        image_url = (image_url or '').strip()
+        image_src = escape(image_url) if image_url else (image_base64 or '').strip()
         
-        # Create table for image and text layout
-        html_parts.append('<table role="presentation" style="width: 100%; border-collapse: collapse;">')
-        html_parts.append('<tr>')
+        # Link wrapper shared by the image and text cells (Outlook compatible)
+        if link_url:
+            link_open = f'<a href="{link_url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">\n'
+            link_close = '</a>\n'
+        else:
+            link_open = link_close = ''
+        
+        text_html = NewsletterGenerator._generate_layer_text(
+            title, subtitle, subtitle2, content,
+            title_color, subtitle_color, subtitle2_color, content_color,
+            title_font_size, subtitle_font_size, subtitle2_font_size, content_font_size,
+            title_bold, subtitle_bold, subtitle2_bold
+        )
         
         # Image on left or right
-        if image_src and image_src.strip() and image_alignment == 'left':
-            # Image column (left) - wrap in link if provided (Outlook compatible)
-            if has_link:
-                html_parts.append(f'<td style="vertical-align: top; padding-right: 20px; width: {image_width}px; background-color: transparent;">')
-                html_parts.append(f'<a href="{link_url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">')
-                html_parts.append(
-                    f'<img src="{image_src}" alt="{title or "Layer Image"}" '
-                    f'width="{image_width}" style="width: {image_width}px; max-width: 100%; height: auto; display: block; border: 0; outline: none; background-color: transparent;">'
-                )
-                html_parts.append('</a>')
-                html_parts.append('</td>')
-            else:
-                html_parts.append(f'<td style="vertical-align: top; padding-right: 20px; width: {image_width}px; background-color: transparent;">')
-                html_parts.append(
-                    f'<img src="{image_src}" alt="{title or "Layer Image"}" '
-                    f'width="{image_width}" style="width: {image_width}px; max-width: 100%; height: auto; display: block; border: 0; outline: none; background-color: transparent;">'
-                )
-                html_parts.append('</td>')
-            
-            # Text column (right) - wrap in link if provided (Outlook compatible)
-            html_parts.append('<td style="vertical-align: top;">')
-            if has_link:
-                html_parts.append(f'<a href="{link_url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">')
-            html_parts.extend(NewsletterGenerator._generate_layer_text(
-                title, subtitle, subtitle2, content,
-                title_color, subtitle_color, subtitle2_color, content_color,
-                title_font_size, subtitle_font_size, subtitle2_font_size, content_font_size,
-                title_bold, subtitle_bold, subtitle2_bold
-            ))
-            if has_link:
-                html_parts.append('</a>')
-            html_parts.append('</td>')
-            
-        elif image_src and image_src.strip() and image_alignment == 'right':
-            # Text column (left) - wrap in link if provided (Outlook compatible)
-            html_parts.append('<td style="vertical-align: top; padding-right: 20px;">')
-            if has_link:
-                html_parts.append(f'<a href="{link_url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">')
-            html_parts.extend(NewsletterGenerator._generate_layer_text(
-                title, subtitle, subtitle2, content,
-                title_color, subtitle_color, subtitle2_color, content_color,
-                title_font_size, subtitle_font_size, subtitle2_font_size, content_font_size,
-                title_bold, subtitle_bold, subtitle2_bold
-            ))
-            if has_link:
-                html_parts.append('</a>')
-            html_parts.append('</td>')
-            
-            # Image column (right) - wrap in link if provided (Outlook compatible)
-            if has_link:
-                html_parts.append(f'<td style="vertical-align: top; width: {image_width}px; background-color: transparent;">')
-                html_parts.append(f'<a href="{link_url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">')
-                html_parts.append(
-                    f'<img src="{image_src}" alt="{title or "Layer Image"}" '
-                    f'width="{image_width}" style="width: {image_width}px; max-width: 100%; height: auto; display: block; border: 0; outline: none; background-color: transparent;">'
-                )
-                html_parts.append('</a>')
-                html_parts.append('</td>')
+        if image_src and image_alignment in ('left', 'right'):
+            image_left = image_alignment == 'left'
+            image_cell = (
+                f'<td style="vertical-align: top;{" padding-right: 20px;" if image_left else ""} width: {image_width}px; background-color: transparent;">\n'
+                f'{link_open}'
+                f'<img src="{image_src}" alt="{title or "Layer Image"}" '
+                f'width="{image_width}" style="width: {image_width}px; max-width: 100%; height: auto; display: block; border: 0; outline: none; background-color: transparent;">\n'
+                f'{link_close}</td>'
+            )
+            if image_left:
+                columns = f'{image_cell}\n<td style="vertical-align: top;">\n{link_open}{text_html}{link_close}</td>'
             else:
-                html_parts.append(f'<td style="vertical-align: top; width: {image_width}px; background-color: transparent;">')
-                html_parts.append(
-                    f'<img src="{image_src}" alt="{title or "Layer Image"}" '
-                    f'width="{image_width}" style="width: {image_width}px; max-width: 100%; height: auto; display: block; border: 0; outline: none; background-color: transparent;">'
-                )
-                html_parts.append('</td>')
+                columns = f'<td style="vertical-align: top; padding-right: 20px;">\n{link_open}{text_html}{link_close}</td>\n{image_cell}'
         else:
-            # No image, just text - wrap in link if provided (Outlook compatible)
-            html_parts.append('<td style="vertical-align: top; width: 100%;">')
-            if has_link:
-                html_parts.append(f'<a href="{link_url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">')
-            html_parts.extend(NewsletterGenerator._generate_layer_text(
-                title, subtitle, subtitle2, content,
-                title_color, subtitle_color, subtitle2_color, content_color,
-                title_font_size, subtitle_font_size, subtitle2_font_size, content_font_size,
-                title_bold, subtitle_bold, subtitle2_bold
-            ))
-            if has_link:
-                html_parts.append('</a>')
-            html_parts.append('</td>')
+            # No image, just text
+            columns = f'<td style="vertical-align: top; width: 100%;">\n{link_open}{text_html}{link_close}</td>'
+        
+        # Layer container with padding and the table for image and text layout
+        return (
+            '<tr class="layer_template">\n'
+            f'<td style="padding: {padding}px 20px;">\n'
+            '<table role="presentation" style="width: 100%; border-collapse: collapse;">\n'
+            '<tr>\n'
+            f'{columns}\n'
+            '</tr>\n</table>\n</td>\n</tr>'
+        )
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _layer_text_tags(
+        title_color: str, subtitle_color: str, subtitle2_color: str, content_color: str,
+        title_font_size: int, subtitle_font_size: int, subtitle2_font_size: int, content_font_size: int,
+        title_bold: bool, subtitle_bold: bool, subtitle2_bold: bool
+    ) -> Tuple[str, str, str, str, str]:
+        """
+        Build the styled opening tags for a layer's text elements.
         
-        html_parts.append('</tr>')
-        html_parts.append('</table>')
+        Layers usually share the same colors and font settings, so the tags are
+        formatted once per style combination and reused within a single render.
         
-        # Close layer container
-        html_parts.append('</td>')
-        html_parts.append('</tr>')
+        Returns:
+            Tuple of (h2, h3, h4, rich-text div, plain-text p) opening tags
+        """
+        # Determine font-weight based on bold setting
+        title_weight = '700' if title_bold else '400'
+        subtitle_weight = '600' if subtitle_bold else '400'
+        subtitle2_weight = '500' if subtitle2_bold else '400'
         
-        return html_parts
+        return (
+            f'<h2 style="color: {title_color}; margin: 0 0 10px 0; font-size: {title_font_size}px; font-weight: {title_weight}; line-height: 1.2;">',
+            f'<h3 style="color: {subtitle_color}; margin: 0 0 10px 0; font-size: {subtitle_font_size}px; font-weight: {subtitle_weight}; line-height: 1.4;">',
+            f'<h4 style="color: {subtitle2_color}; margin: 0 0 15px 0; font-size: {subtitle2_font_size}px; font-weight: {subtitle2_weight}; line-height: 1.4;">',
+            f'<div style="color: {content_color}; font-size: {content_font_size}px; margin: 0; line-height: 1.5;">',
+            f'<p style="color: {content_color}; margin: 0; font-size: {content_font_size}px; line-height: 1.5;">',
+        )
     
     @staticmethod
     def _generate_layer_text(
@@ -833,35 +1248,27 @@ class NewsletterGenerator:
         title_color: str, subtitle_color: str, subtitle2_color: str, content_color: str,
         title_font_size: int, subtitle_font_size: int, subtitle2_font_size: int, content_font_size: int,
         title_bold: bool, subtitle_bold: bool, subtitle2_bold: bool
-    ) -> List[str]:
-        """Generate HTML for layer text content (titles and body)."""
+    ) -> str:
+        """Generate HTML for layer text content (titles and body), one element per line."""
         html_parts = []
         
-        # Determine font-weight based on bold setting
-        title_weight = '700' if title_bold else '400'
-        subtitle_weight = '600' if subtitle_bold else '400'
-        subtitle2_weight = '500' if subtitle2_bold else '400'
+        h2_open, h3_open, h4_open, div_open, p_open = NewsletterGenerator._layer_text_tags(
+            title_color, subtitle_color, subtitle2_color, content_color,
+            title_font_size, subtitle_font_size, subtitle2_font_size, content_font_size,
+            title_bold, subtitle_bold, subtitle2_bold
+        )
         
         # Title (H2)
         if title:
-            html_parts.append(
-                f'<h2 style="color: {title_color}; margin: 0 0 10px 0; font-size: {title_font_size}px; font-weight: {title_weight}; line-height: 1.2;">'
-                f'{title}</h2>'
-            )
+            html_parts.append(f'{h2_open}{title}</h2>')
         
         # Subtitle (H3) - Green/accent color
         if subtitle:
-            html_parts.append(
-                f'<h3 style="color: {subtitle_color}; margin: 0 0 10px 0; font-size: {subtitle_font_size}px; font-weight: {subtitle_weight}; line-height: 1.4;">'
-                f'{subtitle}</h3>'
-            )
+            html_parts.append(f'{h3_open}{subtitle}</h3>')
         
         # Subtitle 2 (H4) - Third title
         if subtitle2:
-            html_parts.append(
-                f'<h4 style="color: {subtitle2_color}; margin: 0 0 15px 0; font-size: {subtitle2_font_size}px; font-weight: {subtitle2_weight}; line-height: 1.4;">'
-                f'{subtitle2}</h4>'
-            )
+            html_parts.append(f'{h4_open}{subtitle2}</h4>')
         
         # Main content
         if content:
@@ -870,20 +1277,18 @@ class NewsletterGenerator:
                 # Content is HTML from the editor (usually starts with <p>)
                 # Clean empty paragraphs and wrap with scoped styles
                 cleaned_content = clean_quill_html(content)
-                html_parts.append(
-                    f'<div style="color: {content_color}; font-size: {content_font_size}px; margin: 0; line-height: 1.5;">{cleaned_content}</div>'
-                )
+                html_parts.append(f'{div_open}{cleaned_content}</div>')
             else:
-                # Plain text, convert newlines to <br> tags
-                formatted_content = content.replace('\n', '<br>')
-                html_parts.append(
-                    f'<p style="color: {content_color}; margin: 0; font-size: {content_font_size}px; line-height: 1.5;">{formatted_content}</p>'
-                )
+                # Plain text, escape stray angle brackets and convert newlines to <br> tags
+                formatted_content = content.translate(PLAIN_TEXT_TO_HTML)
+                html_parts.append(f'{p_open}{formatted_content}</p>')
         
-        return html_parts
+        # Every element ends with a newline so the caller can splice the block
+        # straight into the surrounding cell markup
+        return ''.join(f'{part}\n' for part in html_parts)
 
     @staticmethod
-    def _generate_header_html(subject: str, header_config: Dict) -> List[str]:
+    def _generate_header_html(subject: str, header_config: Dict) -> str:
         """
         Generates the pre-header (hidden text) and main header section.
         Structure: Image -> Blank Space -> Title -> Text
@@ -895,24 +1300,23 @@ class NewsletterGenerator:
         html_parts = []
 
         # 1. Pre-Header Text (Hidden text for email preview) - Only if provided
-        pre_header_text = header_config.get('pre_header_text', '').strip()
+        pre_header_text = escape(header_config.get('pre_header_text', '').strip())
         if pre_header_text:  # Only include if the user fills it
-            html_parts.append('<tr class="header_template">')
             # Email styles to hide text but make it readable for pre-header
             html_parts.append(
+                '<tr class="header_template">\n'
                 '<td style="padding: 0; font-size: 0; line-height: 0; display: none !important; '
-                'max-height: 0px; max-width: 0px; opacity: 0; overflow: hidden; mso-hide: all;">'
-            )
-            html_parts.append(
-                f'<span style="font-size: 1px; color: #ffffff; line-height: 1px;">{pre_header_text}</span>'
+                'max-height: 0px; max-width: 0px; opacity: 0; overflow: hidden; mso-hide: all;">\n'
+                f'<span style="font-size: 1px; color: #ffffff; line-height: 1px;">{pre_header_text}</span>\n'
+                '</td>\n'
+                '</tr>'
             )
-            html_parts.append('</td>')
-            html_parts.append('</tr>')
         
         # 2. Main Header Structure
         header_title = header_config.get('header_title', '').strip()
         if not header_title:  # If no title, use subject as fallback
             header_title = subject
+        header_title = escape(header_title)
         header_text = header_config.get('header_text', '').strip()
         header_image_base64 = header_config.get('header_image_base64')
         header_image_url = header_config.get('header_image_url')
@@ -934,40 +1338,44 @@ class NewsletterGenerator:
         if header_image_base64:
             image_src = header_image_base64
         elif header_image_url:
-            image_src = header_image_url
+            image_src = escape(header_image_url)
         
         # 2.1. Image Row (if image provided)
         if image_src:
-            html_parts.append('<tr class="header_template">')
-            html_parts.append('<td style="padding: 0; margin: 0;">')
             html_parts.append(
+                '<tr class="header_template">\n'
+                '<td style="padding: 0; margin: 0;">\n'
                 f'<img src="{image_src}" alt="{header_title}" '
-                f'style="width: 100%; max-width: {image_width}px; height: auto; display: block; margin: 0; padding: 0;">'
+                f'style="width: 100%; max-width: {image_width}px; height: auto; display: block; margin: 0; padding: 0;">\n'
+                '</td>\n'
+                '</tr>'
             )
-            html_parts.append('</td>')
-            html_parts.append('</tr>')
         
         # 2.2. Blank Space Row
-        html_parts.append('<tr class="header_template">')
-        html_parts.append(f'<td style="padding: 20px 20px; background-color: {header_bg_color};">')
-        html_parts.append('&nbsp;')  # Blank space
-        html_parts.append('</td>')
-        html_parts.append('</tr>')
+        html_parts.append(
+            '<tr class="header_template">\n'
+            f'<td style="padding: 20px 20px; background-color: {header_bg_color};">\n'
+            '&nbsp;\n'
+            '</td>\n'
+            '</tr>'
+        )
         
         # 2.3. Title Row
         if header_title:
-            html_parts.append('<tr class="header_template">')
-            html_parts.append(f'<td style="padding: 0 20px 10px 20px; background-color: {header_bg_color};">')
             html_parts.append(
-                f'<h1 style="color: {title_color}; font-size: {title_font_size}px; margin: 0; font-weight: {title_weight}; line-height: 1.3;">{header_title}</h1>'
+                '<tr class="header_template">\n'
+                f'<td style="padding: 0 20px 10px 20px; background-color: {header_bg_color};">\n'
+                f'<h1 style="color: {title_color}; font-size: {title_font_size}px; margin: 0; font-weight: {title_weight}; line-height: 1.3;">{header_title}</h1>\n'
+                '</td>\n'
+                '</tr>'
             )
-            html_parts.append('</td>')
-            html_parts.append('</tr>')
         
         # 2.4. Header Text Row
         if header_text:
-            html_parts.append('<tr class="header_template">')
-            html_parts.append(f'<td style="padding: 0 20px 20px 20px; background-color: {header_bg_color};">')
+            html_parts.append(
+                '<tr class="header_template">\n'
+                f'<td style="padding: 0 20px 20px 20px; background-color: {header_bg_color};">'
+            )
             
             # Check if header_text is HTML (from rich text editor)
             if '<' in header_text and '>' in header_text:
@@ -977,19 +1385,18 @@ class NewsletterGenerator:
                     f'<div style="color: {text_color}; font-size: {text_font_size}px; margin: 0; line-height: 1.5;">{cleaned_header}</div>'
                 )
             else:
-                # Plain text, convert newlines to <br> tags
-                formatted_text = header_text.replace('\n', '<br>')
+                # Plain text, escape stray angle brackets and convert newlines to <br> tags
+                formatted_text = header_text.translate(PLAIN_TEXT_TO_HTML)
                 html_parts.append(
                     f'<p style="color: {text_color}; font-size: {text_font_size}px; margin: 0; line-height: 1.5;">{formatted_text}</p>'
                 )
             
-            html_parts.append('</td>')
-            html_parts.append('</tr>')
+            html_parts.append('</td>\n</tr>')
 
-        return html_parts
+        return '\n'.join(html_parts)
 
     @staticmethod
-    def _generate_footer_html(footer_config: Dict) -> List[str]:
+    def _generate_footer_html(footer_config: Dict) -> str:
         """
         Generates the footer section with company info, image, and social media links.
         Similar structure to header but for footer.
@@ -1020,47 +1427,50 @@ class NewsletterGenerator:
         directors_color = footer_config.get('directors_color', '#000000')
         directors_size = footer_config.get('directors_size', 12)
         directors_bold = footer_config.get('directors_bold', False)
+        # Image link is read once; the helper may run above or below the text
+        footer_image_link_url = footer_config.get('footer_image_link_url', '')
         
         # Determine image source
         image_src = None
         if footer_image_base64:
             image_src = footer_image_base64
         elif footer_image_url:
-            image_src = footer_image_url
+            image_src = escape(footer_image_url)
         
         # Alignment styles for entire footer
-        align_style = {
-            'left': 'text-align: left;',
-            'center': 'text-align: center;',
-            'right': 'text-align: right;'
-        }.get(footer_alignment, 'text-align: left;')
+        align_style = FOOTER_ALIGN_STYLES.get(footer_alignment, FOOTER_ALIGN_STYLES['left'])
         
         # Font weights
         company_name_weight = '700' if company_name_bold else '400'
         address_weight = '700' if address_bold else '400'
         directors_weight = '700' if directors_bold else '400'
         
+        # Image link is checked once; the helper may run above or below the text
+        has_image_link = bool(footer_image_link_url and footer_image_link_url.strip())
+        footer_image_link_url = escape(footer_image_link_url or '')
+        
         # Helper to append image respecting link
         def _append_footer_image():
             if not image_src:
                 return
             html_parts.append('<div style="margin-bottom: 20px;">')
-            footer_image_link_url = footer_config.get('footer_image_link_url', '')
-            if footer_image_link_url and footer_image_link_url.strip():
+            if has_image_link:
                 html_parts.append(
                     f'<a href="{footer_image_link_url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; display: inline-block;">'
                 )
             html_parts.append(
-                f'<img src="{image_src}" alt="{company_name or "Footer Image"}" '
+                f'<img src="{image_src}" alt="{escape(company_name or "Footer Image")}" '
                 f'width="{image_width}" style="width: {image_width}px; max-width: 100%; height: auto; display: inline-block; border: 0; outline: none; background-color: transparent;">'
             )
-            if footer_image_link_url and footer_image_link_url.strip():
+            if has_image_link:
                 html_parts.append('</a>')
             html_parts.append('</div>')
         
         # Footer container with alignment
-        html_parts.append('<tr class="footer_template">')
-        html_parts.append(f'<td style="padding: 30px 20px; background-color: {footer_bg_color}; {align_style}">')
+        html_parts.append(
+            '<tr class="footer_template">\n'
+            f'<td style="padding: 30px 20px; background-color: {footer_bg_color}; {align_style}">'
+        )
         
         # Image before text
         if footer_image_position == 'Above Text':
@@ -1076,13 +1486,13 @@ class NewsletterGenerator:
                 )
             
             if address:
-                formatted_address = address.replace('\n', '<br>')
+                formatted_address = address.translate(NEWLINE_TO_BR)
                 html_parts.append(
                     f'<p style="color: {address_color}; margin: 0 0 10px 0; font-size: {address_size}px; font-weight: {address_weight}; line-height: 1.5;">{formatted_address}</p>'
                 )
             
             if directors:
-                formatted_directors = directors.replace('\n', '<br>')
+                formatted_directors = directors.translate(NEWLINE_TO_BR)
                 html_parts.append(
                     f'<p style="color: {directors_color}; margin: 0 0 15px 0; font-size: {directors_size}px; font-weight: {directors_weight}; line-height: 1.5;">{formatted_directors}</p>'
                 )
@@ -1097,14 +1507,11 @@ class NewsletterGenerator:
         social_media_type = footer_config.get('social_media_type', 'URLs Only')
         social_image_width = footer_config.get('social_image_width', 30)
         
-        facebook_url = footer_config.get('facebook_url', '')
-        facebook_image_base64 = footer_config.get('facebook_image_base64')
-        linkedin_url = footer_config.get('linkedin_url', '')
-        linkedin_image_base64 = footer_config.get('linkedin_image_base64')
-        xing_url = footer_config.get('xing_url', '')
-        xing_image_base64 = footer_config.get('xing_image_base64')
-        instagram_url = footer_config.get('instagram_url', '')
-        instagram_image_base64 = footer_config.get('instagram_image_base64')
+        # (url, icon) per network, in display order
+        networks = [
+            (label, escape(footer_config.get(f'{network}_url') or ''), footer_config.get(f'{network}_image_base64'))
+            for network, label in SOCIAL_NETWORKS
+        ]
         
         social_links = []
         if social_media_type == "Images":
@@ -1115,60 +1522,31 @@ class NewsletterGenerator:
             # Cell width is larger than icon width to provide internal padding
             # This gives extra space around each icon for better visual separation
             cell_width = social_image_width + 5  # Add 5px extra to cell width (can be adjusted)
+            spacing_cell = f'<td style="padding: 0; width: {spacing_px}px; font-size: 0; line-height: 0;" width="{spacing_px}">&nbsp;</td>'
+            icon_style = (
+                f'width: {social_image_width}px !important; height: {social_image_width}px !important; '
+                f'max-width: {social_image_width}px; max-height: {social_image_width}px; '
+                'border: 0; outline: none; display: block; object-fit: contain;'
+            )
             
-            if facebook_url and facebook_image_base64:
-                social_links.append(
-                    f'<td style="padding: 0; vertical-align: middle; text-align: center;" width="{cell_width}">'
-                    f'<a href="{facebook_url}" target="_blank" rel="noopener noreferrer" style="display: inline-block; text-decoration: none;">'
-                    f'<img src="{facebook_image_base64}" alt="Facebook" width="{social_image_width}" height="{social_image_width}" '
-                    f'style="width: {social_image_width}px !important; height: {social_image_width}px !important; max-width: {social_image_width}px; max-height: {social_image_width}px; border: 0; outline: none; display: block; object-fit: contain;"></a>'
-                    f'</td>'
-                )
-                # Add spacing cell after icon (except for the last one)
-                if linkedin_url and linkedin_image_base64 or xing_url and xing_image_base64 or instagram_url and instagram_image_base64:
-                    social_links.append(f'<td style="padding: 0; width: {spacing_px}px; font-size: 0; line-height: 0;" width="{spacing_px}">&nbsp;</td>')
-            
-            if linkedin_url and linkedin_image_base64:
-                social_links.append(
-                    f'<td style="padding: 0; vertical-align: middle; text-align: center;" width="{cell_width}">'
-                    f'<a href="{linkedin_url}" target="_blank" rel="noopener noreferrer" style="display: inline-block; text-decoration: none;">'
-                    f'<img src="{linkedin_image_base64}" alt="LinkedIn" width="{social_image_width}" height="{social_image_width}" '
-                    f'style="width: {social_image_width}px !important; height: {social_image_width}px !important; max-width: {social_image_width}px; max-height: {social_image_width}px; border: 0; outline: none; display: block; object-fit: contain;"></a>'
-                    f'</td>'
-                )
-                # Add spacing cell after icon (except for the last one)
-                if xing_url and xing_image_base64 or instagram_url and instagram_image_base64:
-                    social_links.append(f'<td style="padding: 0; width: {spacing_px}px; font-size: 0; line-height: 0;" width="{spacing_px}">&nbsp;</td>')
-            
-            if xing_url and xing_image_base64:
-                social_links.append(
-                    f'<td style="padding: 0; vertical-align: middle; text-align: center;" width="{cell_width}">'
-                    f'<a href="{xing_url}" target="_blank" rel="noopener noreferrer" style="display: inline-block; text-decoration: none;">'
-                    f'<img src="{xing_image_base64}" alt="Xing" width="{social_image_width}" height="{social_image_width}" '
-                    f'style="width: {social_image_width}px !important; height: {social_image_width}px !important; max-width: {social_image_width}px; max-height: {social_image_width}px; border: 0; outline: none; display: block; object-fit: contain;"></a>'
-                    f'</td>'
-                )
-                # Add spacing cell after icon (except for the last one)
-                if instagram_url and instagram_image_base64:
-                    social_links.append(f'<td style="padding: 0; width: {spacing_px}px; font-size: 0; line-height: 0;" width="{spacing_px}">&nbsp;</td>')
-            
-            if instagram_url and instagram_image_base64:
+            for label, url, image_base64 in networks:
+                if not (url and image_base64):
+                    continue
+                # Spacing cell between icons (none before the first one)
+                if social_links:
+                    social_links.append(spacing_cell)
                 social_links.append(
                     f'<td style="padding: 0; vertical-align: middle; text-align: center;" width="{cell_width}">'
-                    f'<a href="{instagram_url}" target="_blank" rel="noopener noreferrer" style="display: inline-block; text-decoration: none;">'
-                    f'<img src="{instagram_image_base64}" alt="Instagram" width="{social_image_width}" height="{social_image_width}" '
-                    f'style="width: {social_image_width}px !important; height: {social_image_width}px !important; max-width: {social_image_width}px; max-height: {social_image_width}px; border: 0; outline: none; display: block; object-fit: contain;"></a>'
-                    f'</td>'
+                    f'<a href="{url}" target="_blank" rel="noopener noreferrer" style="display: inline-block; text-decoration: none;">'
+                    f'<img src="{image_base64}" alt="{label}" width="{social_image_width}" height="{social_image_width}" '
+                    f'style="{icon_style}"></a>'
+                    '</td>'
                 )
         else:
-            if facebook_url:
-                social_links.append(f'<a href="{facebook_url}" target="_blank" rel="noopener noreferrer" style="color: #999999; text-decoration: none; margin: 0 10px; display: inline-block;">Facebook</a>')
-            if linkedin_url:
-                social_links.append(f'<a href="{linkedin_url}" target="_blank" rel="noopener noreferrer" style="color: #999999; text-decoration: none; margin: 0 10px; display: inline-block;">LinkedIn</a>')
-            if xing_url:
-                social_links.append(f'<a href="{xing_url}" target="_blank" rel="noopener noreferrer" style="color: #999999; text-decoration: none; margin: 0 10px; display: inline-block;">Xing</a>')
-            if instagram_url:
-                social_links.append(f'<a href="{instagram_url}" target="_blank" rel="noopener noreferrer" style="color: #999999; text-decoration: none; margin: 0 10px; display: inline-block;">Instagram</a>')
+            social_links = [
+                f'<a href="{url}" target="_blank" rel="noopener noreferrer" style="color: #999999; text-decoration: none; margin: 0 10px; display: inline-block;">{label}</a>'
+                for label, url, _ in networks if url
+            ]
         
         if social_links:
             social_media_label = footer_config.get('social_media_label', 'Die Social-Media-Kanäle der bfz gGmbH:')
@@ -1184,24 +1562,20 @@ class NewsletterGenerator:
                 )
             # Use table layout for images (better Outlook compatibility), div for text links
             if social_media_type == "Images":
-                html_parts.append('<table cellpadding="0" cellspacing="0" border="0" style="border-collapse: collapse; border-spacing: 0;">')
-                html_parts.append('<tr>')
+                html_parts.append('<table cellpadding="0" cellspacing="0" border="0" style="border-collapse: collapse; border-spacing: 0;">\n<tr>')
                 html_parts.extend(social_links)
-                html_parts.append('</tr>')
-                html_parts.append('</table>')
+                html_parts.append('</tr>\n</table>\n</div>')
             else:
                 html_parts.append('<div>')
                 html_parts.extend(social_links)
-                html_parts.append('</div>')
-            html_parts.append('</div>')
+                html_parts.append('</div>\n</div>')
         
-        html_parts.append('</td>')
-        html_parts.append('</tr>')
+        html_parts.append('</td>\n</tr>')
         
-        return html_parts
+        return '\n'.join(html_parts)
     
     @staticmethod
-    def _generate_subscription_html(subscription_config: Dict) -> List[str]:
+    def _generate_subscription_html(subscription_config: Dict) -> str:
         """
         Generates the subscription section with company info and unsubscribe link.
         
@@ -1213,19 +1587,10 @@ class NewsletterGenerator:
         html_parts = []
         
         # Separador superior (usando estructura de tabla para compatibilidad con email)
-        html_parts.append('<tr>')
-        html_parts.append('<td style="padding: 20px 20px 10px 20px;">')
-        html_parts.append('<table role="presentation" style="width: 100%; border-collapse: collapse;">')
-        html_parts.append('<tr>')
-        html_parts.append('<td style="height: 1px; background-color: #e0e0e0; line-height: 1px; font-size: 1px;">&nbsp;</td>')
-        html_parts.append('</tr>')
-        html_parts.append('</table>')
-        html_parts.append('</td>')
-        html_parts.append('</tr>')
-        
-        # Contenido del Footer
-        html_parts.append('<tr>')
+        # y apertura del contenido del Footer
         html_parts.append(
+            f'{SUBSCRIPTION_SEPARATOR_ROW}\n'
+            '<tr>\n'
             f'<td align="center" style="padding: 10px 20px 30px 20px; font-size: 12px; line-height: 18px; color: {footer_color};">'
         )
         
@@ -1237,10 +1602,11 @@ class NewsletterGenerator:
         # Copyright
         company_name = subscription_config.get('company_name', 'Your Company Name')
         copyright_text = subscription_config.get('copyright_text', f'© 2024 {company_name}. All rights reserved.')
-        # Replace {company} placeholder if present
-        if copyright_text and '{company}' in copyright_text:
-            copyright_text = copyright_text.replace('{company}', company_name)
         if copyright_text:
+            # Substitute the {company} placeholder; replace() is a single scan
+            # and a no-op when the placeholder is absent. format_map() is not
+            # used because any other braces in free-form user text would raise
+            copyright_text = copyright_text.replace('{company}', company_name)
             html_parts.append(f'{copyright_text}<br>')
         
         # Address
@@ -1249,19 +1615,17 @@ class NewsletterGenerator:
             html_parts.append(f'{address}<br><br>')
         
         # Enlaces de Unsubscribe/View Online
-        unsubscribe_link = subscription_config.get('unsubscribe_link', '#UNSUBSCRIBE_LINK')
-        view_online_link = subscription_config.get('view_online_link', '#VIEW_ONLINE_LINK')
+        unsubscribe_link = escape(subscription_config.get('unsubscribe_link', '#UNSUBSCRIBE_LINK') or '')
+        view_online_link = escape(subscription_config.get('view_online_link', '#VIEW_ONLINE_LINK') or '')
         
         html_parts.append(
-            f'<a href="{unsubscribe_link}" target="_blank" style="color: {footer_color}; text-decoration: underline;">Unsubscribe</a>'
+            f'<a href="{unsubscribe_link}" target="_blank" style="color: {footer_color}; text-decoration: underline;">Unsubscribe</a>\n'
+            f' &bull; <a href="{view_online_link}" target="_blank" style="color: {footer_color}; text-decoration: underline;">View Online</a>\n'
+            '</td>\n'
+            '</tr>'
         )
-        html_parts.append(
-            f' &bull; <a href="{view_online_link}" target="_blank" style="color: {footer_color}; text-decoration: underline;">View Online</a>'
-        )
-        html_parts.append('</td>')
-        html_parts.append('</tr>')
         
-        return html_parts
+        return '\n'.join(html_parts)
 
 
 def parse_html_template(html_content: str) -> Optional[Dict]:
@@ -1802,7 +2166,7 @@ def render_sidebar() -> Dict:
             st.session_state["import_template_uploader_key"] = "import_template_file_0"
         uploaded_file = st.file_uploader(
             "Select HTML Template File",
-            type=['html', 'htm'],
+            type=TEMPLATE_UPLOAD_TYPES,
             help="Upload an exported HTML newsletter template file",
             key=st.session_state["import_template_uploader_key"]
         )
@@ -1810,8 +2174,9 @@ def render_sidebar() -> Dict:
         if st.button("📥 Import Template", type="primary", disabled=uploaded_file is None):
             if uploaded_file is not None:
                 try:
-                    # Read the HTML content
-                    html_content = uploaded_file.read().decode('utf-8')
+                    # Read the HTML content; getvalue() hands back the upload's buffer
+                    # without depending on (or moving) the stream position
+                    html_content = uploaded_file.getvalue().decode('utf-8')
                     
                     # Parse the HTML and extract configuration
                     template_data = parse_html_template(html_content)
@@ -1875,33 +2240,18 @@ def render_sidebar() -> Dict:
             help="Maximum width of the newsletter in pixels"
         )
         
-        font_options = [
-            "Oswald, sans-serif",
-            "Arial, sans-serif",
-            "Helvetica, sans-serif",
-            "Georgia, serif",
-            "Times New Roman, serif",
-            "Verdana, sans-serif",
-            "Courier New, monospace",
-            "Trebuchet MS, sans-serif",
-            "Comic Sans MS, cursive"
-        ]
-        
         # Get and normalize Font Family index from session_state
         font_family_value = st.session_state.get("Font Family", 0)
         
         # Ensure the value is a valid integer index
         if isinstance(font_family_value, str):
             # If it's a string, find the index
-            try:
-                font_family_value = font_options.index(font_family_value)
-            except ValueError:
-                font_family_value = 0
+            font_family_value = FONT_OPTION_INDEX.get(font_family_value, 0)
         else:
             # Convert to int and ensure it's within valid range
             try:
                 font_family_value = int(font_family_value)
-                if font_family_value < 0 or font_family_value >= len(font_options):
+                if font_family_value < 0 or font_family_value >= len(FONT_OPTIONS):
                     font_family_value = 0
             except (ValueError, TypeError):
                 font_family_value = 0
@@ -1909,14 +2259,14 @@ def render_sidebar() -> Dict:
         # Use a temporary key to avoid serialization issues, then update session_state
         font_family = st.selectbox(
             "Font Family",
-            options=font_options,
+            options=FONT_OPTIONS,
             index=font_family_value,
             key="font_family_selectbox",
             help="Font family for the newsletter text"
         )
         
         # Update session_state with the selected index
-        st.session_state["Font Family"] = font_options.index(font_family)
+        st.session_state["Font Family"] = FONT_OPTION_INDEX[font_family]
         
         st.subheader("Color Settings")
         background_color = st.color_picker(
@@ -1951,15 +2301,16 @@ def render_sidebar() -> Dict:
         }
 
 
-def render_header_config(email_subject: str) -> Dict:
+@st.fragment
+def render_header_config(email_subject: str):
     """
     Render header configuration form in the main area.
     
     Args:
         email_subject: Default email subject for header title
         
-    Returns:
-        Dictionary with header configuration
+    The configuration dictionary is stored in st.session_state['header_config_output'],
+    so main() sees the values of the latest fragment rerun.
     """
     st.header("📋 Header Configuration")
     
@@ -1982,17 +2333,16 @@ def render_header_config(email_subject: str) -> Dict:
         )
     
     # Second row: Image Source
-    image_source_options = ["External URL", "Upload Image (Base64)"]
     normalized_header_source = normalize_choice(
         st.session_state.get("header_image_source", "External URL"),
-        image_source_options,
+        IMAGE_SOURCE_OPTIONS,
         "External URL"
     )
     st.session_state["header_image_source"] = normalized_header_source
     # Use the session_state key directly - Streamlit will use the value from session_state
     image_source = st.radio(
         "Image Source",
-        options=image_source_options,
+        options=IMAGE_SOURCE_OPTIONS,
         key="header_image_source",
         help="Choose how to provide the header image"
     )
@@ -2039,13 +2389,17 @@ def render_header_config(email_subject: str) -> Dict:
             
             header_image_file = st.file_uploader(
                 "Header Logo/Image",
-                type=['jpg', 'jpeg', 'png', 'JPG', 'JPEG', 'PNG'],
+                type=IMAGE_UPLOAD_TYPES,
                 key="header_image",
                 help="Upload a logo or image for the header (optional)"
             )
             # Process header image (new upload takes precedence)
             if header_image_file is not None:
-                header_image_base64 = ImageProcessor.convert_to_base64(header_image_file)
+                # The width input is rendered next to the uploader, so read its current value from state
+                header_image_base64 = ImageProcessor.convert_to_base64(
+                    header_image_file,
+                    max_width=st.session_state.get("header_image_width", 1000)
+                )
                 # Update session_state with new image
                 st.session_state["header_image_base64"] = header_image_base64
             elif existing_base64:
@@ -2129,7 +2483,7 @@ def render_header_config(email_subject: str) -> Dict:
             key="header_text_color",
             help="Color for the header text"
         )
-    return {
+    st.session_state['header_config_output'] = {
         'header_title': header_title,
         'header_text': header_text,
         'header_image_base64': header_image_base64,
@@ -2145,20 +2499,40 @@ def render_header_config(email_subject: str) -> Dict:
     }
 
 
-def render_footer_config() -> Dict:
+def footer_image_uploads() -> List[Tuple[object, Optional[int]]]:
+    """
+    Return the footer image and social icon uploads with their display widths.
+    
+    Icons are only included while the footer shows them as images; the form
+    ignores leftover icon uploads in "URLs Only" mode, so encoding them is wasted.
+    """
+    uploads = [(st.session_state.get("footer_image"), st.session_state.get("footer_image_width", 600))]
+    if st.session_state.get("footer_social_type") == "Images":
+        uploads.extend(
+            (st.session_state.get(f"footer_{network}_image"), st.session_state.get("footer_social_image_width", 30))
+            for network, _ in SOCIAL_NETWORKS
+        )
+    return uploads
+
+
+@st.fragment
+def render_footer_config():
     """
     Render footer configuration form in the main area.
     Similar to header but for footer section.
     
-    Returns:
-        Dictionary with footer configuration
+    The configuration dictionary is stored in st.session_state['footer_config_output'],
+    so main() sees the values of the latest fragment rerun.
     """
     st.header("📄 Footer Configuration")
     
+    # Encode the footer image and social icons in parallel; main() only
+    # prefetches on full reruns, not when this fragment reruns on its own
+    ImageProcessor.prefetch_base64(footer_image_uploads())
+    
     # First row: Footer alignment | Footer Background Color
     col_row1_1, col_row1_2 = st.columns(2)
     with col_row1_1:
-        footer_alignment_options = ['Left', 'Center', 'Right']
         footer_alignment_index = st.session_state.get("footer_alignment", 0)
         # Ensure index is an integer
         try:
@@ -2170,13 +2544,13 @@ def render_footer_config() -> Dict:
         # Use temporary key to avoid serialization issues
         footer_alignment = st.selectbox(
             "Footer Alignment",
-            options=footer_alignment_options,
+            options=FOOTER_ALIGNMENT_OPTIONS,
             index=footer_alignment_index,
             key="footer_alignment_selectbox",
             help="Alignment of the entire footer content (image and text)"
         )
         # Update session_state with the selected index
-        st.session_state["footer_alignment"] = footer_alignment_options.index(footer_alignment)
+        st.session_state["footer_alignment"] = FOOTER_ALIGNMENT_OPTIONS.index(footer_alignment)
     with col_row1_2:
         footer_bg_color = st.color_picker(
             "Footer Background Color",
@@ -2194,18 +2568,17 @@ def render_footer_config() -> Dict:
     )
     
     # Second row: Image Source (full width)
-    image_source_options = ["External URL", "Upload Image (Base64)"]
     footer_key = "footer_image_source"
     normalized_footer_source = normalize_choice(
         st.session_state.get(footer_key, "External URL"),
-        image_source_options,
+        IMAGE_SOURCE_OPTIONS,
         "External URL"
     )
     st.session_state[footer_key] = normalized_footer_source
     # Use the session_state key directly - Streamlit will use the value from session_state
     image_source = st.radio(
         "Image Source",
-        options=image_source_options,
+        options=IMAGE_SOURCE_OPTIONS,
         key=footer_key,
         help="Choose how to provide the footer image"
     )
@@ -2252,13 +2625,17 @@ def render_footer_config() -> Dict:
             
             footer_image_file = st.file_uploader(
                 "Footer Logo/Image",
-                type=['jpg', 'jpeg', 'png', 'JPG', 'JPEG', 'PNG'],
+                type=IMAGE_UPLOAD_TYPES,
                 key="footer_image",
                 help="Upload a logo or image for the footer (optional)"
             )
             # Process footer image (new upload takes precedence)
             if footer_image_file is not None:
-                footer_image_base64 = ImageProcessor.convert_to_base64(footer_image_file)
+                # The width input is rendered next to the uploader, so read its current value from state
+                footer_image_base64 = ImageProcessor.convert_to_base64(
+                    footer_image_file,
+                    max_width=st.session_state.get("footer_image_width", 600)
+                )
                 # Update session_state with new image
                 st.session_state["footer_image_base64"] = footer_image_base64
             elif existing_base64:
@@ -2277,18 +2654,17 @@ def render_footer_config() -> Dict:
         )
     
     # Position of the footer image relative to text
-    footer_image_position_options = ["Above Text", "After Text"]
     normalized_footer_image_position = normalize_choice(
         st.session_state.get("footer_image_position", "Above Text"),
-        footer_image_position_options,
+        FOOTER_IMAGE_POSITION_OPTIONS,
         "Above Text"
     )
     # Ensure session_state is set before widget creation
     st.session_state["footer_image_position"] = normalized_footer_image_position
     footer_image_position = st.radio(
         "Footer Image Position",
-        options=footer_image_position_options,
-        index=footer_image_position_options.index(normalized_footer_image_position),
+        options=FOOTER_IMAGE_POSITION_OPTIONS,
+        index=FOOTER_IMAGE_POSITION_OPTIONS.index(normalized_footer_image_position),
         key="footer_image_position",
         help="Choose if the footer image goes above the text or after the text (always before Social Media links)"
     )
@@ -2435,7 +2811,6 @@ def render_footer_config() -> Dict:
             key="footer_social_label_bold",
             help="Make social media label bold"
         )
-    social_media_type_options = ["URLs Only", "Images"]
     raw_value = st.session_state.get("footer_social_type", "URLs Only")
     
     # Check if there are any social media images loaded - if so, default to "Images"
@@ -2450,9 +2825,9 @@ def render_footer_config() -> Dict:
     # IMPORTANT: Set the value in session_state BEFORE creating the widget
     if isinstance(raw_value, int):
         # Old format: convert index to option string
-        social_media_type_value = social_media_type_options[max(0, min(1, raw_value))]
+        social_media_type_value = SOCIAL_MEDIA_TYPE_OPTIONS[max(0, min(1, raw_value))]
         st.session_state["footer_social_type"] = social_media_type_value
-    elif raw_value not in social_media_type_options:
+    elif raw_value not in SOCIAL_MEDIA_TYPE_OPTIONS:
         # Invalid value or if we have images, default to "Images", otherwise "URLs Only"
         social_media_type_value = "Images" if has_social_images else "URLs Only"
         st.session_state["footer_social_type"] = social_media_type_value
@@ -2466,7 +2841,7 @@ def render_footer_config() -> Dict:
     # Use the session_state key directly - Streamlit will use the value from session_state
     social_media_type = st.radio(
         "Social Media Type",
-        options=social_media_type_options,
+        options=SOCIAL_MEDIA_TYPE_OPTIONS,
         key="footer_social_type",
         help="Choose between text links or image icons"
     )
@@ -2505,7 +2880,7 @@ def render_footer_config() -> Dict:
             
             facebook_image = st.file_uploader(
                 "Facebook Icon",
-                type=['jpg', 'jpeg', 'png', 'JPG', 'JPEG', 'PNG', 'svg', 'SVG'],
+                type=SOCIAL_ICON_UPLOAD_TYPES,
                 key="footer_facebook_image",
                 help="Upload Facebook icon image"
             )
@@ -2531,7 +2906,7 @@ def render_footer_config() -> Dict:
             
             linkedin_image = st.file_uploader(
                 "LinkedIn Icon",
-                type=['jpg', 'jpeg', 'png', 'JPG', 'JPEG', 'PNG', 'svg', 'SVG'],
+                type=SOCIAL_ICON_UPLOAD_TYPES,
                 key="footer_linkedin_image",
                 help="Upload LinkedIn icon image"
             )
@@ -2559,7 +2934,7 @@ def render_footer_config() -> Dict:
             
             xing_image = st.file_uploader(
                 "Xing Icon",
-                type=['jpg', 'jpeg', 'png', 'JPG', 'JPEG', 'PNG', 'svg', 'SVG'],
+                type=SOCIAL_ICON_UPLOAD_TYPES,
                 key="footer_xing_image",
                 help="Upload Xing icon image"
             )
@@ -2585,7 +2960,7 @@ def render_footer_config() -> Dict:
             
             instagram_image = st.file_uploader(
                 "Instagram Icon",
-                type=['jpg', 'jpeg', 'png', 'JPG', 'JPEG', 'PNG', 'svg', 'SVG'],
+                type=SOCIAL_ICON_UPLOAD_TYPES,
                 key="footer_instagram_image",
                 help="Upload Instagram icon image"
             )
@@ -2600,9 +2975,10 @@ def render_footer_config() -> Dict:
     instagram_image_base64 = None
     
     if social_media_type == "Images":
-        # Process new uploads (they take precedence)
+        # Process new uploads (they take precedence); icons are shown at
+        # social_image_width, so large logo files are shrunk to match
         if facebook_image:
-            facebook_image_base64 = ImageProcessor.convert_to_base64(facebook_image)
+            facebook_image_base64 = ImageProcessor.convert_to_base64(facebook_image, max_width=social_image_width)
             # Update session_state with new image
             st.session_state["footer_facebook_image_base64"] = facebook_image_base64
         elif st.session_state.get("footer_facebook_image_base64"):
@@ -2610,7 +2986,7 @@ def render_footer_config() -> Dict:
             facebook_image_base64 = st.session_state.get("footer_facebook_image_base64")
         
         if linkedin_image:
-            linkedin_image_base64 = ImageProcessor.convert_to_base64(linkedin_image)
+            linkedin_image_base64 = ImageProcessor.convert_to_base64(linkedin_image, max_width=social_image_width)
             # Update session_state with new image
             st.session_state["footer_linkedin_image_base64"] = linkedin_image_base64
         elif st.session_state.get("footer_linkedin_image_base64"):
@@ -2618,7 +2994,7 @@ def render_footer_config() -> Dict:
             linkedin_image_base64 = st.session_state.get("footer_linkedin_image_base64")
         
         if xing_image:
-            xing_image_base64 = ImageProcessor.convert_to_base64(xing_image)
+            xing_image_base64 = ImageProcessor.convert_to_base64(xing_image, max_width=social_image_width)
             # Update session_state with new image
             st.session_state["footer_xing_image_base64"] = xing_image_base64
         elif st.session_state.get("footer_xing_image_base64"):
@@ -2626,14 +3002,14 @@ def render_footer_config() -> Dict:
             xing_image_base64 = st.session_state.get("footer_xing_image_base64")
         
         if instagram_image:
-            instagram_image_base64 = ImageProcessor.convert_to_base64(instagram_image)
+            instagram_image_base64 = ImageProcessor.convert_to_base64(instagram_image, max_width=social_image_width)
             # Update session_state with new image
             st.session_state["footer_instagram_image_base64"] = instagram_image_base64
         elif st.session_state.get("footer_instagram_image_base64"):
             # Use existing image from session_state (loaded from template)
             instagram_image_base64 = st.session_state.get("footer_instagram_image_base64")
     
-    return {
+    st.session_state['footer_config_output'] = {
         'footer_image_base64': footer_image_base64,
         'footer_image_url': footer_image_url,
         'footer_image_link_url': footer_image_link_url,
@@ -2670,12 +3046,13 @@ def render_footer_config() -> Dict:
     }
 
 
-def render_subscription_config() -> Dict:
+@st.fragment
+def render_subscription_config():
     """
     Render subscription configuration form in the main area.
     
-    Returns:
-        Dictionary with subscription configuration
+    The configuration dictionary is stored in st.session_state['subscription_config_output'],
+    so main() sees the values of the latest fragment rerun.
     """
     st.header("📄 Subscription Configuration")
     
@@ -2734,7 +3111,7 @@ def render_subscription_config() -> Dict:
             help="Text color for footer content"
         )
     
-    return {
+    st.session_state['subscription_config_output'] = {
         'company_name': company_name,
         'address': address,
         'copyright_text': copyright_text,
@@ -2745,15 +3122,31 @@ def render_subscription_config() -> Dict:
     }
 
 
-def render_layer_form(layer_number: int) -> Dict:
+def find_duplicate_layer_orders() -> List[int]:
+    """
+    Return the layer orders used by more than one layer.
+    
+    Read from the order widgets' session state, which holds the current value of
+    every layer (not just the one whose fragment is running).
+    """
+    num_layers = int(st.session_state.get("Number of Layers", 1))
+    # One counting pass instead of a list.count scan per order
+    order_counts = Counter(
+        st.session_state.get(f"layer_order_{i}", i) for i in range(1, num_layers + 1)
+    )
+    return sorted(order for order, count in order_counts.items() if count > 1)
+
+
+@st.fragment
+def render_layer_form(layer_number: int):
     """
     Render form inputs for a single content layer.
     
     Args:
         layer_number: The layer index (1-based)
         
-    Returns:
-        Dictionary containing layer content data
+    The layer dictionary is stored in st.session_state[f'layer_output_{layer_number}'],
+    so main() sees the values of the latest fragment rerun.
     """
     st.subheader(f"Layer {layer_number}")
     
@@ -2919,18 +3312,17 @@ def render_layer_form(layer_number: int) -> Dict:
     st.markdown("**Image Configuration**")
     
     # Image source selection
-    image_source_options = ["External URL", "Upload Image (Base64)"]
     layer_key = f"image_source_{layer_number}"
     normalized_layer_source = normalize_choice(
         st.session_state.get(layer_key, "External URL"),
-        image_source_options,
+        IMAGE_SOURCE_OPTIONS,
         "External URL"
     )
     st.session_state[layer_key] = normalized_layer_source
     # Use the session_state key directly - Streamlit will use the value from session_state
     image_source = st.radio(
         f"Image Source - Layer {layer_number}",
-        options=image_source_options,
+        options=IMAGE_SOURCE_OPTIONS,
         key=layer_key,
         help="Choose how to provide the image"
     )
@@ -2979,13 +3371,17 @@ def render_layer_form(layer_number: int) -> Dict:
             
             image_file = st.file_uploader(
                 f"Upload Image - Layer {layer_number}",
-                type=['jpg', 'jpeg', 'png', 'JPG', 'JPEG', 'PNG'],
+                type=IMAGE_UPLOAD_TYPES,
                 key=f"image_{layer_number}",
                 help="Upload an image for this layer (JPG or PNG)"
             )
             # Process image to Base64 (new upload takes precedence)
             if image_file is not None:
-                image_base64 = ImageProcessor.convert_to_base64(image_file)
+                # The width input is rendered next to the uploader, so read its current value from state
+                image_base64 = ImageProcessor.convert_to_base64(
+                    image_file,
+                    max_width=st.session_state.get(f"image_width_{layer_number}", 210)
+                )
                 if image_base64 is None:
                     st.warning(f"⚠️ Error processing image for Layer {layer_number}. Please try uploading again.")
                 else:
@@ -2995,7 +3391,6 @@ def render_layer_form(layer_number: int) -> Dict:
                 # Use existing base64 from session_state
                 image_base64 = existing_base64
         
-        alignment_options = ['Left', 'Right']
         alignment_index = st.session_state.get(f"alignment_{layer_number}", 0)
         # Ensure index is an integer
         try:
@@ -3007,13 +3402,13 @@ def render_layer_form(layer_number: int) -> Dict:
         # Use temporary key to avoid serialization issues
         image_alignment = st.selectbox(
             f"Image Position - Layer {layer_number}",
-            options=alignment_options,
+            options=LAYER_ALIGNMENT_OPTIONS,
             index=alignment_index,
             key=f"alignment_selectbox_{layer_number}",
             help="Position of image relative to text"
         )
         # Update session_state with the selected index
-        st.session_state[f"alignment_{layer_number}"] = alignment_options.index(image_alignment)
+        st.session_state[f"alignment_{layer_number}"] = LAYER_ALIGNMENT_OPTIONS.index(image_alignment)
     
     with col_img2:
         image_width = st.number_input(
@@ -3036,7 +3431,7 @@ def render_layer_form(layer_number: int) -> Dict:
             help="Vertical padding for this layer"
         )
     
-    return {
+    st.session_state[f'layer_output_{layer_number}'] = {
         'order': layer_order,
         'title': title,
         'subtitle': subtitle,
@@ -3060,6 +3455,12 @@ def render_layer_form(layer_number: int) -> Dict:
         'content_font_size': content_font_size,
         'content_color': content_color
     }
+    
+    # main() shows the duplicated-orders error on full runs only; when an order
+    # change in this fragment adds or clears a duplicate, rerun the whole app so
+    # the message is current
+    if find_duplicate_layer_orders() != st.session_state.get('layer_duplicate_orders'):
+        st.rerun()
 
 
 def apply_imported_template_to_session_state(template_data: dict):
@@ -3086,22 +3487,8 @@ def apply_imported_template_to_session_state(template_data: dict):
     if 'max_width' in config:
         st.session_state['Maximum Newsletter Width (px)'] = int(config['max_width'])
     if 'font_family' in config:
-        font_options = [
-            "Oswald, sans-serif",
-            "Arial, sans-serif",
-            "Helvetica, sans-serif",
-            "Georgia, serif",
-            "Times New Roman, serif",
-            "Verdana, sans-serif",
-            "Courier New, monospace",
-            "Trebuchet MS, sans-serif",
-            "Comic Sans MS, cursive"
-        ]
         font_family_str = str(config['font_family']) if config['font_family'] is not None else ""
-        if font_family_str in font_options:
-            st.session_state['Font Family'] = int(font_options.index(font_family_str))
-        else:
-            st.session_state['Font Family'] = 0
+        st.session_state['Font Family'] = FONT_OPTION_INDEX.get(font_family_str, 0)
     if 'background_color' in config:
         st.session_state['Background Color'] = str(config['background_color']) if config['background_color'] is not None else "#FFFFFF"
     if 'text_color' in config:
@@ -3262,7 +3649,7 @@ def apply_imported_template_to_session_state(template_data: dict):
         if has_social_images:
             st.session_state['footer_social_type'] = "Images"
         else:
-            st.session_state['footer_social_type'] = social_media_type_str if social_media_type_str in ["URLs Only", "Images"] else "URLs Only"
+            st.session_state['footer_social_type'] = social_media_type_str if social_media_type_str in SOCIAL_MEDIA_TYPE_OPTIONS else "URLs Only"
     elif has_social_images:
         st.session_state['footer_social_type'] = "Images"
     if 'social_media_label' in footer_config:
@@ -3340,23 +3727,9 @@ def apply_template_to_session_state(template_data: dict):
         # Convert to native Python int
         st.session_state['Maximum Newsletter Width (px)'] = int(config['max_width'])
     if 'font_family' in config:
-        font_options = [
-            "Oswald, sans-serif",
-            "Arial, sans-serif",
-            "Helvetica, sans-serif",
-            "Georgia, serif",
-            "Times New Roman, serif",
-            "Verdana, sans-serif",
-            "Courier New, monospace",
-            "Trebuchet MS, sans-serif",
-            "Comic Sans MS, cursive"
-        ]
         font_family_str = str(config['font_family']) if config['font_family'] is not None else ""
-        if font_family_str in font_options:
-            # Ensure index is a native Python int
-            st.session_state['Font Family'] = int(font_options.index(font_family_str))
-        else:
-            st.session_state['Font Family'] = 0  # Default to first option
+        # Default to first option for unknown fonts
+        st.session_state['Font Family'] = FONT_OPTION_INDEX.get(font_family_str, 0)
     if 'background_color' in config:
         st.session_state['Background Color'] = str(config['background_color']) if config['background_color'] is not None else "#FFFFFF"
     if 'text_color' in config:
@@ -3550,7 +3923,7 @@ def apply_template_to_session_state(template_data: dict):
         if has_social_images:
             st.session_state['footer_social_type'] = "Images"
         else:
-            st.session_state['footer_social_type'] = social_media_type_str if social_media_type_str in ["URLs Only", "Images"] else "URLs Only"
+            st.session_state['footer_social_type'] = social_media_type_str if social_media_type_str in SOCIAL_MEDIA_TYPE_OPTIONS else "URLs Only"
     elif has_social_images:
         # If no type specified but we have images, default to "Images"
         st.session_state['footer_social_type'] = "Images"
@@ -3786,70 +4159,86 @@ def main():
     
     st.divider()
     
-    # Render sidebar and get basic configuration
+    # Render sidebar and get basic configuration. The sidebar stays part of the
+    # full run because it controls how many layers and sections are rendered.
+    # Header, layer, footer and subscription forms are fragments: editing them
+    # reruns only that form, which stores its values in session_state; they are
+    # read back from there on the full reruns triggered by the Generate/Save buttons.
     config = render_sidebar()
     
+    # Encode every uploaded image (header, layers, footer and social icons) in
+    # parallel up front; each form's own convert_to_base64 call is then a cache hit
+    ImageProcessor.prefetch_base64([
+        (st.session_state.get("header_image"), st.session_state.get("header_image_width", 1000)),
+        *(
+            (st.session_state.get(f"image_{i}"), st.session_state.get(f"image_width_{i}", 210))
+            for i in range(1, config['num_layers'] + 1)
+        ),
+        *footer_image_uploads(),
+    ])
+    
     # Header Configuration (in main area)
-    header_config = render_header_config(config['email_subject'])
+    render_header_config(config['email_subject'])
+    header_config = st.session_state['header_config_output']
     st.divider()
     
     # Main content area - Content Layers
     st.header("📝 Content Layers")
     
+    # Validate that layer orders are unique. Stored before the layer fragments
+    # run, which compare against it to detect order changes made on their own
+    duplicate_orders = find_duplicate_layer_orders()
+    st.session_state['layer_duplicate_orders'] = duplicate_orders
+    
     # Generate forms for each layer
-    layers = []
-    for i in range(1, config['num_layers'] + 1):
-        layer_data = render_layer_form(i)
-        layers.append(layer_data)
+    layers = [None] * config['num_layers']
+    for i in range(config['num_layers']):
+        render_layer_form(i + 1)
+        layers[i] = st.session_state[f'layer_output_{i + 1}']
         st.divider()
     
-    # Validate that layer orders are unique
-    orders = [layer.get('order', i) for i, layer in enumerate(layers, start=1)]
-    duplicate_orders = [order for order in set(orders) if orders.count(order) > 1]
-    
     if duplicate_orders:
         st.error(f"⚠️ Newsletter cannot be generated: The layers have duplicated orders. Duplicated orders: {', '.join(map(str, sorted(duplicate_orders)))}. Please assign a unique order to each layer before generating.")
-        # Still sort layers for display, but warn user
-        layers = sorted(layers, key=lambda x: (x.get('order', 999), layers.index(x)))
-    else:
-        # Sort layers by order before generating HTML
-        layers = sorted(layers, key=lambda x: x.get('order', 999))
+    
+    # Sort layers by order before generating HTML; sorted() is stable, so
+    # layers sharing an order keep their form order
+    layers = sorted(layers, key=lambda x: x.get('order', 999))
     
     # Footer Configuration (in main area)
-    footer_config = render_footer_config()
+    render_footer_config()
+    footer_config = st.session_state['footer_config_output']
     st.divider()
     
     # Subscription Configuration (in main area) - only show if enabled
     subscription_config = None
     if config.get('include_subscription', True):
-        subscription_config = render_subscription_config()
+        render_subscription_config()
+        subscription_config = st.session_state['subscription_config_output']
         st.divider()
     
     # Generate Newsletter button
     if st.button("🚀 Generate Newsletter", type="primary", width='stretch'):
-        # Validate layer orders again before generating
-        orders = [layer.get('order', i) for i, layer in enumerate(layers, start=1)]
-        duplicate_orders = [order for order in set(orders) if orders.count(order) > 1]
-        
+        # Clicking the button is a full rerun, so the order check above is current
         if duplicate_orders:
             st.error(f"⚠️ Newsletter cannot be generated: The layers have duplicated orders. Duplicated orders: {', '.join(map(str, sorted(duplicate_orders)))}. Please assign a unique order to each layer before generating.")
         else:
-            # Generate HTML
-            html_content = NewsletterGenerator.generate_html(
-                subject=config['email_subject'],
-                background_color=config['background_color'],
-                text_color=config['text_color'],
-                header_config=header_config,
-                layers=layers,
-                footer_config=footer_config,
-                subscription_config=subscription_config,
-                max_width=config['max_width'],
-                font_family=config['font_family']
-            )
-            
-            # Store in session state for download
-            st.session_state['newsletter_html'] = html_content
-            st.session_state['newsletter_subject'] = config['email_subject']
+            # Store only the generation inputs (and their digest) in session state;
+            # the preview and the download render the HTML through the
+            # render_cached cache, so the multi-MB document is not pinned in
+            # every user's session
+            newsletter_config = {
+                'subject': config['email_subject'],
+                'background_color': config['background_color'],
+                'text_color': config['text_color'],
+                'header_config': header_config,
+                'layers': layers,
+                'footer_config': footer_config,
+                'subscription_config': subscription_config,
+                'max_width': config['max_width'],
+                'font_family': config['font_family']
+            }
+            st.session_state['newsletter_config'] = newsletter_config
+            st.session_state['newsletter_config_digest'] = NewsletterGenerator.config_digest(newsletter_config)
             
             st.success("✅ Newsletter generated successfully!")
     
@@ -3879,13 +4268,24 @@ def main():
                 rerun_after("save_template_success")
     
     # Preview and Download section
-    if 'newsletter_html' in st.session_state:
+    if 'newsletter_config' in st.session_state:
+        newsletter_config = st.session_state['newsletter_config']
+        config_digest = st.session_state['newsletter_config_digest']
         st.header("Preview & Download")
         
         # Preview
         st.subheader("Live Preview")
+        newsletter_html = NewsletterGenerator.render_cached(config_digest, newsletter_config)
+        # The markup is ASCII apart from user text, so the length is a close
+        # byte estimate without encoding the whole document on every rerun
+        if len(newsletter_html) > EMAIL_CLIP_THRESHOLD_BYTES:
+            st.warning(
+                f"⚠️ The newsletter HTML is about {len(newsletter_html) // 1024} KB. Gmail clips messages "
+                f"larger than {EMAIL_CLIP_THRESHOLD_BYTES // 1024} KB. Uploaded images are embedded as Base64; "
+                "consider hosting large images and using 'External URL' instead."
+            )
         st.components.v1.html(
-            st.session_state['newsletter_html'],
+            newsletter_html,
             height=800,
             scrolling=True
         )
@@ -3899,11 +4299,12 @@ def main():
             filename = f"newsletter_{template_name.replace(' ', '_')}.html"
         else:
             # Fallback to subject if no template name available
-            filename = f"{st.session_state['newsletter_subject'].replace(' ', '_')}_no_name.html"
+            filename = f"{newsletter_config['subject'].replace(' ', '_')}_no_name.html"
         
+        # Deferred download: the callable only runs when the button is clicked
         st.download_button(
             label="📥 Download HTML File",
-            data=st.session_state['newsletter_html'],
+            data=lambda: NewsletterGenerator.render_cached(config_digest, newsletter_config),
             file_name=filename,
             mime="text/html",
             width='stretch'